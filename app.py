@@ -1,12 +1,14 @@
 import streamlit as st
 import pandas as pd
 import re
+import importlib.util
 import numpy as np  # add at top
 from io import BytesIO
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 from zoneinfo import ZoneInfo
-from openpyxl.styles import PatternFill, Border, Side, Alignment, Font
-from openpyxl.utils import get_column_letter
+
+_SGT = ZoneInfo("Asia/Singapore")
+_CUTOFF = time(15, 0)   # submissions after 3pm count from the next day
 
 # ───── Streamlit setup ────────────────────────────────────────────────────────
 st.set_page_config(page_title="Visitor List Cleaner", layout="wide")
@@ -35,11 +37,15 @@ with st.expander("Why is Data Integrity Important?"):
 
 # ───── Download Sample Template ────────────────────────────────────────────────
 # This reads the Excel you committed as sample_template.xlsx in your repo root
-with open("sample_template.xlsx", "rb") as f:
-    sample_bytes = f.read()
+# (once per process; Streamlit reruns the script on every interaction)
+@st.cache_data(show_spinner=False)
+def load_sample_template() -> bytes:
+    with open("sample_template.xlsx", "rb") as f:
+        return f.read()
+
 st.download_button(
     label="🌟 Download Template",
-    data=sample_bytes,
+    data=load_sample_template(),
     file_name="sample_template.xlsx",
     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
 )
@@ -57,7 +63,7 @@ st.markdown(
 uploaded = st.file_uploader("📁 Upload file", type=["xlsx"])
 
 # ───── 4) Estimate Clearance Date ───────────────────────────────────────────────
-now = datetime.now(ZoneInfo("Asia/Singapore"))
+now = datetime.now(_SGT)   # one timestamp per rerun
 formatted_now = now.strftime("%A %d %B, %I:%M%p").lstrip("0")
 #st.markdown("### 🗓️ Estimate Clearance Date 🍍")
 
@@ -65,24 +71,15 @@ formatted_now = now.strftime("%A %d %B, %I:%M%p").lstrip("0")
 st.write("**Today is:**", formatted_now)
 
 if st.button("▶️ Earliest clearance:"):
-    if now.time() >= datetime.strptime("15:00", "%H:%M").time():
+    if now.time() >= _CUTOFF:
         effective_submission_date = now.date() + timedelta(days=1)
     else:
         effective_submission_date = now.date()
 
-    while effective_submission_date.weekday() >= 5:
-        effective_submission_date += timedelta(days=1)
-
-    working_days_count = 0
-    estimated_date = effective_submission_date
-    while working_days_count < 2:
-        estimated_date += timedelta(days=1)
-        if estimated_date.weekday() < 5:
-            working_days_count += 1
-
-    clearance_date = estimated_date
-    while clearance_date.weekday() >= 5:
-        clearance_date += timedelta(days=1)
+    # roll a weekend submission forward to Monday, then add 2 working days
+    clearance_date = np.busday_offset(
+        np.datetime64(effective_submission_date, "D"), 2, roll="forward"
+    ).astype(object)
 
     formatted = f"{clearance_date:%A} {clearance_date.day} {clearance_date:%B}"
     st.success(f" **{formatted}**")
@@ -99,42 +96,60 @@ def smart_title_case(name):
             cleaned.append(w.capitalize())
     return " ".join(cleaned)
 
-def nationality_group(row):
-    nat = str(row["Nationality (Country Name)"]).strip().lower()
-    pr  = str(row["PR"]).strip().lower()
-    if nat == "singapore":
-        return 1
-    elif pr in ("yes","y","pr"):
-        return 2
-    elif nat == "malaysia":
-        return 3
-    elif nat == "india":
-        return 4
-    else:
-        return 5
-
-def split_name(full_name):
-    s = str(full_name).strip()
-    if " " in s:
-        i = s.find(" ")
-        return pd.Series([s[:i], s[i+1:]])
-    return pd.Series([s, ""])
-
-def clean_gender(g):
-    v = str(g).strip().upper()
-    if v == "M": return "Male"
-    if v == "F": return "Female"
-    if v in ("MALE","FEMALE"): return v.title()
-    return v
-
-def normalize_pr(value):
-    val = str(value).strip().lower()
-    if val in ("pr", "yes", "y"):
-        return "PR"
-    elif val in ("n", "no", "na", "", "nan"):
-        return ""
-    else:
-        return val.upper() if val.isalpha() else val
+# regexes used by clean_data, compiled once at import
+_RX_PTE  = re.compile(r"\bPte\s+Ltd\b", re.IGNORECASE)
+_RX_PLATE = re.compile(r"\s*(;)[\s;]*|\s+")   # separator run -> ";", other space -> ""
+_RX_WS   = re.compile(r"\s+")
+_RX_ND   = re.compile(r"\D")
+# full day-first or month-name dates: 31/12/2027, 31-12-27, 31-Dec-2027,
+# Dec 31, 2027 (a bare "2027" or "12A" must not match)
+_RX_DATE = re.compile(
+    r"^\s*(?:\d{1,2}[-/. ]+(?:\d{1,2}|[A-Za-z]{3,9})[-/., ]+\d{2}(?:\d{2})?"
+    r"|[A-Za-z]{3,9}\.? \d{1,2},? \d{4})\b"
+)
+_RX_DATE_HINT = re.compile(r"[-/. ]\d")   # cheap "could be a date" check
+_PLATE_SEPS = str.maketrans("/,", ";;")
+
+NAT_MAP = {
+    "chinese": "China",
+    "singaporean": "Singapore",
+    "malaysian": "Malaysia",
+    "indian": "India",
+    "bangladeshi": "Bangladesh",
+    "british": "United Kingdom",
+    "uk": "United Kingdom",
+    "england": "United Kingdom",
+    "us": "United States",
+    "usa": "United States",
+    "u.s.": "United States",
+    "u.s.a.": "United States"
+}
+
+GENDER_MAP = {"M": "Male", "F": "Female", "MALE": "Male", "FEMALE": "Female"}
+
+PR_MAP = {
+    "pr": "PR", "yes": "PR", "y": "PR",
+    "n": "", "no": "", "na": "", "": "", "nan": "",
+}
+
+def _parse_wp_date(s: pd.Series) -> pd.Series:
+    # template asks for YYYY-MM-DD; exact=False also accepts a trailing time
+    dates = pd.to_datetime(s, errors="coerce", format="%Y-%m-%d", exact=False)
+    miss = dates.isna() & s.notna()
+    if not miss.any():
+        return dates
+    # retry misses: Y/M/D or Y.M.D as ISO, then date-shaped text
+    # day-first (SG convention)
+    txt = (
+        s[miss].astype(str)
+          .str.replace("/", "-", regex=False).str.replace(".", "-", regex=False)
+    )
+    found = pd.to_datetime(txt, errors="coerce", format="%Y-%m-%d", exact=False)
+    rest = found.isna() & txt.str.contains(_RX_DATE)
+    if rest.any():
+        found[rest] = pd.to_datetime(txt[rest], errors="coerce", format="mixed", dayfirst=True)
+    dates[miss] = found
+    return dates
 
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     # keep first 13 cols & rename
@@ -152,34 +167,30 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     df["Company Full Name"]
       .astype(str)
       .apply(smart_title_case)
-      .str.replace(r"\bPte\s+Ltd\b", "Pte Ltd", flags=re.IGNORECASE, regex=True)
+      .str.replace(_RX_PTE, "Pte Ltd", regex=True)
     )
 
     # standardize nationality
-    nat_map = {
-        "chinese": "China",
-        "singaporean": "Singapore",
-        "malaysian": "Malaysia",
-        "indian": "India",
-        "bangladeshi": "Bangladesh",
-        "british": "United Kingdom",
-        "uk": "United Kingdom",
-        "england": "United Kingdom",
-        "us": "United States",
-        "usa": "United States",
-        "u.s.": "United States",
-        "u.s.a.": "United States"
-    }
-
-    df["Nationality (Country Name)"] = (
+    nat = (
         df["Nationality (Country Name)"]
           .astype(str).str.strip().str.lower()
-          .replace(nat_map, regex=False)
+          .replace(NAT_MAP, regex=False)
           .str.title()
     )
+    # as a category, so the sort below compares codes
+    df["Nationality (Country Name)"] = nat.astype("category")
+
+    # 🔄 Apply updated PR normalization
+    # (anything unmapped is upper-cased if purely alphabetic, else kept as is;
+    # done before sorting so the lowered values double as a sort key)
+    pr = df["PR"].fillna("").astype(str).str.strip().str.lower()
+    df["PR"] = pr.map(PR_MAP).fillna(pr.where(~pr.str.isalpha(), pr.str.upper()))
 
     # sort & serial
-    df["SortGroup"] = df.apply(nationality_group, axis=1)
+    df["SortGroup"] = np.select(
+        [nat.eq("Singapore"), pr.isin(["yes","y","pr"]), nat.eq("Malaysia"), nat.eq("India")],
+        [1, 2, 3, 4], default=5,
+    ).astype(np.int8)
     df = (
         df.sort_values(
             ["Company Full Name","SortGroup","Nationality (Country Name)","Full Name As Per NRIC"],
@@ -189,164 +200,145 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     )
     df["S/N"] = range(1, len(df) + 1)
 
-    # 🔄 Apply updated PR normalization
-    df["PR"] = df["PR"].apply(normalize_pr)
-
     # normalize ID type
     df["Identification Type"] = (
         df["Identification Type"]
-          .astype(str).str.strip()
-          .apply(lambda v: "FIN" if v.lower() == "fin" else v.upper())
+          .fillna("").astype(str).str.strip().str.upper()
     )
 
-    # Clean vehicle plate numbers
-    df["Vehicle Plate Number"] = (
+    # Clean vehicle plate numbers: "/" and "," become ";", then a single
+    # regex pass collapses each separator run to one ";" and drops any
+    # other whitespace (so "sg 1 / sg2" -> "SG1;SG2")
+    plates = (
         df["Vehicle Plate Number"]
           .astype(str)
-          .str.strip()
           .str.upper()
-          .replace({r"(?i)^nan$": "", r"(?i)^nil$": ""}, regex=True)
-          .str.replace(r"[\/,]", ";", regex=True)
-          .str.replace(r"\s*;\s*", ";", regex=True)
-          .str.replace(r"\s+", "", regex=True)
+          .str.translate(_PLATE_SEPS)
+          .str.replace(_RX_PLATE, r"\1", regex=True)
+          .str.strip(";")
     )
+    df["Vehicle Plate Number"] = plates.mask(plates.isin(["NAN", "NIL"]), "")
 
     # ---------------- Split Names (enhanced & safe) ----------------
     df["Full Name As Per NRIC"] = (
         df["Full Name As Per NRIC"]
           .astype(str)
-          .str.replace(r"\s+", " ", regex=True)
+          .str.replace(_RX_WS, " ", regex=True)
           .str.strip()
           .str.title()
     )
-    parts = df["Full Name As Per NRIC"].str.split(r"\s+", n=1, expand=True)
+    # reindex keeps column 1 even when no name has a second word
+    parts = df["Full Name As Per NRIC"].str.split(n=1, expand=True).reindex(columns=[0, 1])
     df["First Name as per NRIC"] = parts[0]
     df["Middle and Last Name as per NRIC"] = parts[1].fillna(parts[0])
     # ---------------------------------------------------------------
 
     # swap IC/WP if needed
     iccol, wpcol = "IC (Last 3 digits and suffix) 123A", "Work Permit Expiry Date"
-    if df[iccol].astype(str).str.contains("-", na=False).any():
-        df[[iccol, wpcol]] = df[[wpcol, iccol]]
+    # (whichever column parses as dates more often is the expiry date; if
+    # neither parses at all, a "-" in the IC column still means a swap;
+    # the swap goes through numpy so it is positional, not label-aligned)
+    wp_dates = _parse_wp_date(df[wpcol])
+    wp_rate = wp_dates.notna().mean()
+    # normal IC values ("123A") can't be dates, so only parse the column
+    # when it holds datetimes or date-shaped text
+    ic = df[iccol]
+    if (
+        pd.api.types.is_datetime64_any_dtype(ic)
+        or ic.fillna("").astype(str).str.contains(_RX_DATE_HINT).any()
+    ):
+        ic_dates = _parse_wp_date(ic)
+    else:
+        ic_dates = pd.Series(pd.NaT, index=ic.index, dtype="datetime64[ns]")
+    ic_rate = ic_dates.notna().mean()
+    if ic_rate > wp_rate or (
+        ic_rate == wp_rate == 0
+        and df[iccol].astype(str).str.contains("-", regex=False, na=False).any()
+    ):
+        df[[iccol, wpcol]] = df[[wpcol, iccol]].to_numpy()
+        wp_dates = ic_dates
     df[iccol] = df[iccol].astype(str).str[-4:]
 
-    # clean mobile
-    def fix_mobile(x):
-        d = re.sub(r"\D", "", str(x))
-        if len(d) > 8:
-            extra = len(d) - 8
-            if d.endswith("0"*extra): d = d[:-extra]
-            else: d = d[-8:]
-        if len(d) < 8: d = d.zfill(8)
-        return d
-    df["Mobile Number"] = df["Mobile Number"].apply(fix_mobile)
+    # clean mobile: keep digits; if too long, drop padded trailing zeros
+    # when that is exactly the excess, otherwise keep the last 8
+    d = df["Mobile Number"].fillna("").astype(str).str.replace(_RX_ND, "", regex=True)
+    n = d.str.len()
+    trailing_zeros = n - d.str.rstrip("0").str.len()
+    trimmed = np.where(trailing_zeros >= n - 8, d.str[:8], d.str[-8:])
+    df["Mobile Number"] = d.where(n <= 8, trimmed).str.zfill(8)
+
+    gender = df["Gender"].fillna("").astype(str).str.strip().str.upper()
+    df["Gender"] = gender.map(GENDER_MAP).fillna(gender)
+    df[wpcol] = wp_dates.dt.strftime("%Y-%m-%d")
 
-    df["Gender"] = df["Gender"].apply(clean_gender)
-    df[wpcol] = pd.to_datetime(df[wpcol], errors="coerce").dt.strftime("%Y-%m-%d")
+    # remaining low-cardinality columns as categories too
+    for c in ("PR", "Identification Type", "Gender"):
+        df[c] = df[c].astype("category")
 
     return df
     
+def find_issues(df: pd.DataFrame):
+    # returns (rows × columns grid of cells to highlight, issue count);
+    # expects clean_data output, whose ID type / nationality / PR columns
+    # are already stripped and cased, so they are compared as they are
+    idt  = df["Identification Type"]
+    nat  = df["Nationality (Country Name)"]
+    wpd  = df["Work Permit Expiry Date"].fillna("")
+    name = df["Full Name As Per NRIC"].fillna("")
+
+    # expiry date is expired OR within 6 months
+    # (<= six_months_ahead already covers "expired" as well)
+    six_months_ahead = datetime.now(_SGT).date() + timedelta(days=180)
+    expiry = pd.to_datetime(wpd, format="%Y-%m-%d", errors="coerce")
+    expiring = expiry.notna() & (expiry <= pd.Timestamp(six_months_ahead))
+
+    is_sg, is_pr = nat.eq("Singapore"), df["PR"].eq("PR")
+    bad = (
+        (is_sg & is_pr)                               # Singaporeans cannot be PR
+        | (idt.ne("NRIC") & is_pr)
+        | (idt.eq("FIN") & (is_sg | is_pr))
+        | (idt.eq("NRIC") & ~(is_sg | is_pr))
+        | (idt.isin(["FIN", "WP"]) & wpd.eq(""))
+    )
+
+    # duplicate names: highlight every occurrence, count each repeat once
+    dup = name.duplicated(keep=False) & name.ne("")
+    errors = int(expiring.sum() + bad.sum() + (name.duplicated() & name.ne("")).sum())
+
+    # cells to highlight, as a rows × columns grid
+    warn = np.zeros(df.shape, dtype=bool)
+    warn[expiring.to_numpy(), 8] = True
+    warn[np.ix_(bad.to_numpy(), [6, 9, 10, 8])] = True   # G, J, K, I
+    warn[dup.to_numpy(), 3] = True
+
+    return warn, errors
+
+# output cell styles (xlsxwriter formats belong to a workbook, so only the
+# properties live at module level)
+NORMAL_STYLE  = {"font_name": "Calibri", "font_size": 9, "border": 1,
+                 "align": "center", "valign": "vcenter"}
+HEADER_STYLE  = {**NORMAL_STYLE, "bold": True, "bg_color": "#94B455"}
+WARNING_STYLE = {**NORMAL_STYLE, "bg_color": "#DA9694"}
+SUMMARY_STYLE = {"font_size": 9, "border": 1, "align": "center", "valign": "vcenter"}
+
 def generate_visitor_only(df: pd.DataFrame) -> BytesIO:
-    buf = BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Visitor List")
-        ws = writer.sheets["Visitor List"]
-
-        header_fill  = PatternFill("solid", fgColor="94B455")
-        warning_fill = PatternFill("solid", fgColor="DA9694")
-        border       = Border(*[Side("thin")]*4)
-        center       = Alignment("center","center")
-        normal_font  = Font(name="Calibri", size=9)
-        bold_font    = Font(name="Calibri", size=9, bold=True)
-
-        # style all cells
-        for row in ws.iter_rows():
-            for cell in row:
-                cell.border    = border
-                cell.alignment = center
-                cell.font      = normal_font
+    warn, errors = find_issues(df)
+    if errors:
+        st.warning(f"⚠️ {errors} validation issue(s) found (including permits expiring within 6 months).")
 
-        # header row
-        for col in range(1, ws.max_column + 1):
-            h = ws[f"{get_column_letter(col)}1"]
-            h.fill = header_fill
-            h.font = bold_font
-        ws.freeze_panes = "B2"
-
-        errors = 0
-        seen = {}                    # ← initialize duplicate‐tracker
-
-        for r in range(2, ws.max_row + 1):
-            # pull values
-            idt = str(ws[f"G{r}"].value).strip().upper()
-            nat = str(ws[f"J{r}"].value).strip().title()
-            pr  = str(ws[f"K{r}"].value).strip().lower()
-            wpd = str(ws[f"I{r}"].value).strip()
-            name = str(ws[f"D{r}"].value or "").strip()   # ← grab “Full Name” from col D
-
-            bad = False
-
-            # ─── highlight if expiry date is already expired OR within 6 months ───
-            #expiry_str = str(ws[f"I{r}"].value).strip()
-            #try:
-            #    expiry_date = datetime.strptime(expiry_str, "%Y-%m-%d").date()
-            #    today_sg = datetime.now(ZoneInfo("Asia/Singapore")).date()
-            #    six_months_ahead = today_sg + timedelta(days=180)  # ≈ 6 months
-            #    if expiry_date <= today or expiry_date <= six_months_ahead:
-            #        for col in range(1, ws.max_column + 1):
-            #            ws[f"I{r}"].fill = warning_fill
-            #        errors += 1
-            #except ValueError:
-            #    pass  # skip if not a valid date
-
-            # ─── highlight if expiry date is expired OR within 6 months ───
-            expiry_str = str(ws[f"I{r}"].value).strip()
-            try:
-                expiry_date = datetime.strptime(expiry_str, "%Y-%m-%d").date()
-                today_sg = datetime.now(ZoneInfo("Asia/Singapore")).date()
-                six_months_ahead = today_sg + timedelta(days=180)  # ≈ 6 months
-            
-                # Note: <= six_months_ahead already covers "expired" as well
-                if expiry_date <= six_months_ahead:
-                    # highlight just the expiry cell:
-                    ws[f"I{r}"].fill = warning_fill
-                    errors += 1
-            
-                    # If you'd rather highlight the whole row, replace the line above with:
-                    # for c in range(1, ws.max_column + 1):
-                    #     ws[f"{get_column_letter(c)}{r}"].fill = warning_fill
-            
-            except ValueError:
-                pass  # skip if not a valid date
-
-            # ── NEW RULE: Singaporeans cannot be PR ────────────────────────────
-            if nat == "Singapore" and pr == "pr":
-                bad = True
-            
-            if idt != "NRIC" and pr == "pr": bad = True
-            if idt == "FIN" and (nat == "Singapore" or pr == "pr"): bad = True
-            if idt == "NRIC" and not (nat == "Singapore" or pr == "pr"): bad = True
-            if idt == "FIN" and not wpd: bad = True
-            if idt == "WP" and not wpd: bad = True
-
-            if bad:
-                # highlight the offending cells
-                for col in ("G","J","K","I"):
-                    ws[f"{col}{r}"].fill = warning_fill
-                errors += 1
-
-            # ─── duplicate‐check on column D ──────────────────────────
-            if name:
-                if name in seen:
-                    # highlight both the old row and the new row
-                    ws[f"D{r}"].fill = warning_fill
-                    ws[f"D{seen[name]}"].fill = warning_fill
-                    errors += 1
-                else:
-                    seen[name] = r
-
-        if errors:
-            st.warning(f"⚠️ {errors} validation issue(s) found (including permits expiring within 6 months).")
+    buf = BytesIO()
+    # constant_memory streams each row out once it is complete, so rows
+    # must be written top to bottom, each with its final formats
+    with pd.ExcelWriter(buf, engine="xlsxwriter",
+                        engine_kwargs={"options": {"constant_memory": True}}) as writer:
+        wb = writer.book
+        ws = wb.add_worksheet("Visitor List")
+
+        # formats are created once and shared by every cell that uses them
+        header_fmt  = wb.add_format(HEADER_STYLE)
+        normal_fmt  = wb.add_format(NORMAL_STYLE)
+        warning_fmt = wb.add_format(WARNING_STYLE)
+        summary_fmt = wb.add_format(SUMMARY_STYLE)
 
         # Set fixed column widths
         column_widths = {
@@ -363,54 +355,68 @@ def generate_visitor_only(df: pd.DataFrame) -> BytesIO:
             "L": 5.81,
             "M": 11.5,
         }
-        # B is dynamic (auto-fit based on max content)
-        for col in ws.columns:
-            col_letter = get_column_letter(col[0].column)
-            if col_letter == "B":
-                width = max(len(str(cell.value)) for cell in col if cell.value)
-                ws.column_dimensions[col_letter].width = width
-            elif col_letter in column_widths:
-                ws.column_dimensions[col_letter].width = column_widths[col_letter]
-        
-        for row in ws.iter_rows():
-            ws.row_dimensions[row[0].row].height = 16.8
+        # B is dynamic (auto-fit to the header or the longest plate string)
+        plate_len = df["Vehicle Plate Number"].fillna("").astype(str).str.len()
+        column_widths["B"] = max(len(df.columns[1]), int(plate_len.max()) if len(plate_len) else 0)
+        for col_letter, width in column_widths.items():
+            ws.set_column(f"{col_letter}:{col_letter}", width)
+
+        # header row
+        ws.freeze_panes(1, 1)
+        ws.set_default_row(16.8)
+        ws.write_row(0, 0, list(df.columns), header_fmt)
+
+        # flagged cells grouped by row once, so unflagged rows cost nothing extra
+        flagged = {}
+        for r, c in zip(*np.nonzero(warn)):
+            flagged.setdefault(int(r), []).append(int(c))
+
+        # data rows, flagged cells rewritten with the (shared) warning format
+        values = df.astype(object).where(df.notna(), None)
+        for r, row in enumerate(values.itertuples(index=False)):
+            ws.write_row(r + 1, 0, row, normal_fmt)
+            for c in flagged.get(r, ()):
+                ws.write(r + 1, c, row[c], warning_fmt)
 
         # vehicles summary
-        plates = []
-        for v in df["Vehicle Plate Number"].dropna():
-            plates += [x.strip() for x in str(v).split(";") if x.strip()]
-        ins = ws.max_row + 2
-        if plates:
-            ws[f"B{ins}"].value = "Vehicles"
-            ws[f"B{ins}"].font = Font(size=9)
-            ws[f"B{ins}"].border = border
-            ws[f"B{ins}"].alignment = center
-
-            ws[f"B{ins+1}"].value = ";".join(sorted(set(plates)))
-            ws[f"B{ins+1}"].font = Font(size=9)
-            ws[f"B{ins+1}"].border = border
-            ws[f"B{ins+1}"].alignment = center
+        plates = (
+            df["Vehicle Plate Number"].dropna().astype(str)
+              .str.split(";").explode().str.strip()
+        )
+        plates = plates[plates.ne("")].drop_duplicates().sort_values()
+        ins = len(df) + 2
+        if len(plates):
+            ws.write(ins, 1, "Vehicles", summary_fmt)
+            ws.write(ins + 1, 1, ";".join(plates), summary_fmt)
             ins += 2
 
-        ws[f"B{ins}"].value = "Total Visitors"
-        ws[f"B{ins}"].font = Font(size=9)
-        ws[f"B{ins}"].border = border
-        ws[f"B{ins}"].alignment = center
-
-        ws[f"B{ins+1}"].value = df["Company Full Name"].notna().sum()
-        ws[f"B{ins+1}"].font = Font(size=9)
-        ws[f"B{ins+1}"].border = border
-        ws[f"B{ins+1}"].alignment = center
+        ws.write(ins, 1, "Total Visitors", summary_fmt)
+        ws.write(ins + 1, 1, int(df["Company Full Name"].notna().sum()), summary_fmt)
 
     buf.seek(0)
     return buf
 
     
 # ───── Read, Clean & Download ────────────────────────────────────────────────
-if uploaded:
-    raw_df = pd.read_excel(uploaded, sheet_name="Visitor List")
+# calamine (Rust) parses much faster than openpyxl; use it when
+# python-calamine is installed and pandas is new enough (>= 2.2) to know it
+_EXCEL_ENGINE = (
+    "calamine"
+    if importlib.util.find_spec("python_calamine")
+    and tuple(int(x) for x in pd.__version__.split(".")[:2]) >= (2, 2)
+    else "openpyxl"
+)
+
+def read_visitor_list(file_bytes: bytes) -> pd.DataFrame:
+    return pd.read_excel(BytesIO(file_bytes), sheet_name="Visitor List", engine=_EXCEL_ENGINE)
+
+# cached on the uploaded bytes (and the day, since expiry highlighting depends
+# on it), so reruns of the same file skip cleaning and writing altogether
+# (bounded: the day is part of the key, so a day-old entry is never hit again)
+@st.cache_data(show_spinner=False, ttl="1d", max_entries=32)
+def process_upload(file_bytes: bytes, today_str: str):
+    raw_df = read_visitor_list(file_bytes)
 
-    
     company_cell = raw_df.iloc[0, 2]
     company = (
         str(company_cell).strip()
@@ -420,13 +426,15 @@ if uploaded:
 
     cleaned = clean_data(raw_df)
     out_buf = generate_visitor_only(cleaned)
+    return f"{company}_{today_str}.xlsx", out_buf.getvalue()
 
-    today_str = datetime.now(ZoneInfo("Asia/Singapore")).strftime("%Y%m%d")
-    fname = f"{company}_{today_str}.xlsx"
+if uploaded:
+    today_str = now.strftime("%Y%m%d")
+    fname, out_bytes = process_upload(uploaded.getvalue(), today_str)
 
     st.download_button(
         label="📥 Download Cleaned Visitor List",
-        data=out_buf.getvalue(),
+        data=out_bytes,
         file_name=fname,
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )